@@ -0,0 +1,278 @@
+"""
+Battery Change Notifications
+Wakes the battery monitoring loop when the OS reports a battery or power source
+change, so threshold crossings are handled without waiting for the next poll
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+# UPower object exposing the combined state of all laptop batteries
+UPOWER_SERVICE = 'org.freedesktop.UPower'
+UPOWER_DISPLAY_DEVICE = '/org/freedesktop/UPower/devices/DisplayDevice'
+
+# DisplayDevice properties that matter to the monitoring loop. Others, such as
+# Energy, EnergyRate and UpdateTime, change on every UPower refresh.
+UPOWER_WAKE_PROPERTIES = frozenset(('Percentage', 'State', 'Online'))
+
+
+class BatteryEventWatcher:
+    """
+    Delivers OS battery change notifications to asyncio
+    
+    On Linux this listens for UPower PropertiesChanged signals (requires the
+    optional dbus-next package). On Windows it registers for battery percentage
+    and AC/DC power source notifications. On other platforms, or if registration
+    fails, wait() simply behaves like asyncio.sleep().
+    """
+    
+    def __init__(self):
+        """
+        Initialize the watcher. Call start() from a running event loop to subscribe.
+        """
+        self._loop = None
+        self._event = None
+        self._bus = None
+        self._thread = None
+        self._close_window = None
+        self.active = False
+    
+    async def start(self):
+        """
+        Subscribe to OS battery notifications
+        
+        Returns:
+            True if notifications are active, False if falling back to polling
+        """
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        try:
+            if sys.platform.startswith('linux'):
+                self.active = await self._start_linux()
+            elif sys.platform == 'win32':
+                self.active = await self._start_windows()
+        except Exception as e:
+            logger.debug("Battery notifications unavailable, using polling only: %s", e)
+            self.stop()
+        return self.active
+    
+    async def wait(self, timeout: float):
+        """
+        Wait until the OS reports a battery change or the timeout expires
+        
+        Args:
+            timeout: Maximum time in seconds to wait
+        
+        Returns:
+            True if woken by a battery change, False if the timeout expired
+        """
+        if not self.active:
+            await asyncio.sleep(timeout)
+            return False
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+            changed = True
+        except asyncio.TimeoutError:
+            changed = False
+        self._event.clear()
+        return changed
+    
+    def stop(self):
+        """
+        Unsubscribe from OS battery notifications
+        """
+        if self._bus is not None:
+            self._bus.disconnect()
+            self._bus = None
+        if self._close_window is not None:
+            self._close_window()
+            self._close_window = None
+        self.active = False
+    
+    def _notify(self):
+        """
+        Wake any pending wait(). Safe to call from any thread.
+        """
+        self._loop.call_soon_threadsafe(self._event.set)
+    
+    def _on_properties_changed(self, interface, changed, invalidated):
+        """
+        Handle a UPower PropertiesChanged signal, waking only on relevant changes
+        
+        Args:
+            interface: D-Bus interface whose properties changed
+            changed: Dict of changed property names to their new values
+            invalidated: Names of properties invalidated without a new value
+        """
+        if UPOWER_WAKE_PROPERTIES.intersection(changed) or UPOWER_WAKE_PROPERTIES.intersection(invalidated):
+            self._notify()
+    
+    async def _start_linux(self):
+        """
+        Subscribe to UPower property changes on the system D-Bus
+        
+        Returns:
+            True if subscribed, False if dbus-next is not installed
+        """
+        try:
+            from dbus_next import BusType
+            from dbus_next.aio import MessageBus
+        except ImportError:
+            logger.debug("dbus-next not installed, battery notifications disabled")
+            return False
+        
+        self._bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
+        introspection = await self._bus.introspect(UPOWER_SERVICE, UPOWER_DISPLAY_DEVICE)
+        proxy = self._bus.get_proxy_object(UPOWER_SERVICE, UPOWER_DISPLAY_DEVICE, introspection)
+        properties = proxy.get_interface('org.freedesktop.DBus.Properties')
+        properties.on_properties_changed(self._on_properties_changed)
+        return True
+    
+    async def _start_windows(self):
+        """
+        Register a hidden window for power setting notifications
+        
+        The window and its message loop live on a daemon thread, which forwards
+        WM_POWERBROADCAST messages to the event loop.
+        
+        Returns:
+            True once the window is registered for notifications
+        """
+        ready = threading.Event()
+        errors = []
+        self._thread = threading.Thread(
+            target=self._run_windows_message_loop,
+            args=(ready, errors),
+            name="battery-events",
+            daemon=True
+        )
+        self._thread.start()
+        await self._loop.run_in_executor(None, ready.wait)
+        if errors:
+            raise errors[0]
+        return True
+    
+    def _run_windows_message_loop(self, ready, errors):
+        """
+        Create the notification window and pump its messages (runs on a thread)
+        
+        Args:
+            ready: Event set once registration has succeeded or failed
+            errors: List that receives the exception if registration fails
+        """
+        import ctypes
+        from ctypes import wintypes
+        
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        
+        LRESULT = ctypes.c_ssize_t
+        WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+        WM_DESTROY = 0x0002
+        WM_CLOSE = 0x0010
+        WM_POWERBROADCAST = 0x0218
+        DEVICE_NOTIFY_WINDOW_HANDLE = 0
+        
+        class GUID(ctypes.Structure):
+            _fields_ = [
+                ('Data1', wintypes.DWORD),
+                ('Data2', wintypes.WORD),
+                ('Data3', wintypes.WORD),
+                ('Data4', ctypes.c_ubyte * 8),
+            ]
+        
+        class WNDCLASSW(ctypes.Structure):
+            _fields_ = [
+                ('style', wintypes.UINT),
+                ('lpfnWndProc', WNDPROC),
+                ('cbClsExtra', ctypes.c_int),
+                ('cbWndExtra', ctypes.c_int),
+                ('hInstance', wintypes.HINSTANCE),
+                ('hIcon', wintypes.HICON),
+                ('hCursor', wintypes.HICON),
+                ('hbrBackground', wintypes.HBRUSH),
+                ('lpszMenuName', wintypes.LPCWSTR),
+                ('lpszClassName', wintypes.LPCWSTR),
+            ]
+        
+        # GUID_BATTERY_PERCENTAGE_REMAINING and GUID_ACDC_POWER_SOURCE
+        power_settings = [
+            GUID(0xA7AD8041, 0xB45A, 0x4CAE, (ctypes.c_ubyte * 8)(0x87, 0xA3, 0xEE, 0xCB, 0xB4, 0x68, 0xA9, 0xE1)),
+            GUID(0x5D3E9A59, 0xE9D5, 0x4B00, (ctypes.c_ubyte * 8)(0xA6, 0xBD, 0xFF, 0x34, 0xFF, 0x51, 0x65, 0x48)),
+        ]
+        
+        user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        user32.DefWindowProcW.restype = LRESULT
+        user32.RegisterClassW.argtypes = [ctypes.POINTER(WNDCLASSW)]
+        user32.RegisterClassW.restype = wintypes.ATOM
+        user32.CreateWindowExW.argtypes = [
+            wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+            ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID
+        ]
+        user32.CreateWindowExW.restype = wintypes.HWND
+        user32.RegisterPowerSettingNotification.argtypes = [wintypes.HANDLE, ctypes.POINTER(GUID), wintypes.DWORD]
+        user32.RegisterPowerSettingNotification.restype = wintypes.HANDLE
+        user32.UnregisterPowerSettingNotification.argtypes = [wintypes.HANDLE]
+        user32.PostMessageW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        user32.GetMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT]
+        user32.GetMessageW.restype = wintypes.BOOL
+        user32.TranslateMessage.argtypes = [ctypes.POINTER(wintypes.MSG)]
+        user32.DispatchMessageW.argtypes = [ctypes.POINTER(wintypes.MSG)]
+        user32.DispatchMessageW.restype = LRESULT
+        kernel32.GetModuleHandleW.argtypes = [wintypes.LPCWSTR]
+        kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+        
+        def window_proc(hwnd, msg, wparam, lparam):
+            if msg == WM_POWERBROADCAST:
+                self._notify()
+                return 1
+            if msg == WM_DESTROY:
+                user32.PostQuitMessage(0)
+                return 0
+            return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+        
+        # Keep the callback referenced for as long as the window exists
+        wndproc = WNDPROC(window_proc)
+        registrations = []
+        try:
+            hinstance = kernel32.GetModuleHandleW(None)
+            wndclass = WNDCLASSW()
+            wndclass.lpfnWndProc = wndproc
+            wndclass.hInstance = hinstance
+            wndclass.lpszClassName = "TapoControlBatteryEvents"
+            if not user32.RegisterClassW(ctypes.byref(wndclass)):
+                raise ctypes.WinError(ctypes.get_last_error())
+            
+            hwnd = user32.CreateWindowExW(
+                0, wndclass.lpszClassName, wndclass.lpszClassName, 0,
+                0, 0, 0, 0, None, None, hinstance, None
+            )
+            if not hwnd:
+                raise ctypes.WinError(ctypes.get_last_error())
+            
+            for setting in power_settings:
+                handle = user32.RegisterPowerSettingNotification(
+                    hwnd, ctypes.byref(setting), DEVICE_NOTIFY_WINDOW_HANDLE
+                )
+                if not handle:
+                    raise ctypes.WinError(ctypes.get_last_error())
+                registrations.append(handle)
+            self._close_window = lambda: user32.PostMessageW(hwnd, WM_CLOSE, 0, 0)
+        except Exception as e:
+            errors.append(e)
+            ready.set()
+            return
+        ready.set()
+        
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        
+        for handle in registrations:
+            user32.UnregisterPowerSettingNotification(handle)
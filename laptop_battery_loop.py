@@ -6,32 +6,121 @@ Charging thresholds: Start at 40%, Stop at 80%
 
 import os
 import asyncio
+import logging
 import time
 from datetime import datetime
+from enum import IntEnum
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 import psutil
 
+from battery_events import BatteryEventWatcher
 from tapo_control import TapoP110Controller
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-def get_battery_percent():
+# Monitoring defaults, read once at import. They are converted when monitoring
+# starts, so a bad value only affects the monitoring command.
+_START_THRESHOLD = os.getenv('BATTERY_START_THRESHOLD', '40')
+_STOP_THRESHOLD = os.getenv('BATTERY_STOP_THRESHOLD', '80')
+_CHECK_INTERVAL = os.getenv('BATTERY_CHECK_INTERVAL', '60')
+
+# Shortest wait between battery checks when a threshold is about to be crossed
+MIN_CHECK_INTERVAL = 5
+
+
+class Zone(IntEnum):
     """
-    Get the current battery percentage
+    Battery level relative to the charging thresholds
+    """
+    LOW = 0   # At or below the start threshold
+    MID = 1   # Between the thresholds
+    HIGH = 2  # At or above the stop threshold
+
+
+class Action(IntEnum):
+    """
+    What the monitoring loop does for a given battery zone and charger state
+    """
+    TURN_ON = 0
+    TURN_OFF = 1
+    LOG_ONLY = 2
+    NOOP = 3
+
+
+# Action for each (zone, charger is on) pair. LOG_ONLY becomes NOOP when the
+# same pair was already reported on the previous check.
+DECISIONS: Dict[Tuple[Zone, bool], Action] = {
+    (Zone.LOW, False): Action.TURN_ON,
+    (Zone.LOW, True): Action.LOG_ONLY,
+    (Zone.MID, False): Action.LOG_ONLY,
+    (Zone.MID, True): Action.LOG_ONLY,
+    (Zone.HIGH, False): Action.LOG_ONLY,
+    (Zone.HIGH, True): Action.TURN_OFF,
+}
+
+
+def get_battery_zone(battery_percent: float, start_threshold: int, stop_threshold: int) -> Zone:
+    """
+    Classify the battery level against the charging thresholds
+    
+    Args:
+        battery_percent: Current battery percentage
+        start_threshold: Battery percentage to start charging
+        stop_threshold: Battery percentage to stop charging
     
     Returns:
-        Battery percentage (0-100) or None if battery info is not available
+        The Zone the battery level falls in
+    """
+    if battery_percent <= start_threshold:
+        return Zone.LOW
+    if battery_percent >= stop_threshold:
+        return Zone.HIGH
+    return Zone.MID
+
+
+def get_battery_snapshot() -> Tuple[Optional[float], Optional[bool]]:
+    """
+    Read battery percentage and AC power status with a single sensor query
+    
+    Returns:
+        Tuple of (battery percentage, plugged in), each None if not available
     """
     try:
         battery = psutil.sensors_battery()
         if battery is None:
-            return None
-        return battery.percent
+            return None, None
+        return battery.percent, battery.power_plugged
     except Exception as e:
-        print(f"Error getting battery level: {e}")
-        return None
+        logger.error("Error reading battery information: %s", e)
+        return None, None
+
+
+async def get_battery_snapshot_async() -> Tuple[Optional[float], Optional[bool]]:
+    """
+    Async version of get_battery_snapshot that reads the sensor in a worker thread
+    
+    psutil.sensors_battery() is blocking (a WMI query on Windows), so it is run
+    in the default executor to keep the event loop responsive.
+    
+    Returns:
+        Tuple of (battery percentage, plugged in), each None if not available
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, get_battery_snapshot)
+
+
+def get_battery_percent():
+    """
+    Get the current battery percentage
+    
+    Returns:
+        Battery percentage (0-100) or None if battery info is not available
+    """
+    return get_battery_snapshot()[0]
 
 
 def is_plugged_in():
@@ -41,20 +130,69 @@ def is_plugged_in():
     Returns:
         True if plugged in, False if on battery, None if unable to determine
     """
+    return get_battery_snapshot()[1]
+
+
+def get_next_check_delay(
+    battery_percent: float,
+    rate: float,
+    start_threshold: int,
+    stop_threshold: int,
+    check_interval: int
+):
+    """
+    Estimate how long to wait before the next battery check
+    
+    Sleeps until the battery is expected to reach the threshold it is moving
+    towards, so checks are sparse mid-range and tighter near a threshold.
+    
+    Args:
+        battery_percent: Current battery percentage
+        rate: Observed battery change in percent per second (negative when discharging)
+        start_threshold: Battery percentage to start charging
+        stop_threshold: Battery percentage to stop charging
+        check_interval: Maximum time in seconds between battery checks
+    
+    Returns:
+        Delay in seconds, between MIN_CHECK_INTERVAL and check_interval
+    """
+    if rate > 0 and battery_percent < stop_threshold:
+        delay = (stop_threshold - battery_percent) / rate
+    elif rate < 0 and battery_percent > start_threshold:
+        delay = (start_threshold - battery_percent) / rate
+    else:
+        return check_interval
+    return max(min(MIN_CHECK_INTERVAL, check_interval), min(delay, check_interval))
+
+
+async def wait_for_next_check(battery_events: BatteryEventWatcher, stop_event: asyncio.Event, timeout: float):
+    """
+    Wait until the next battery check is due or monitoring is asked to stop
+    
+    Args:
+        battery_events: Watcher that wakes early on OS battery change notifications
+        stop_event: Event that is set to stop the monitoring loop
+        timeout: Maximum time in seconds to wait
+    
+    Returns:
+        True if stop was requested, False if the next check is due
+    """
+    stop_task = asyncio.ensure_future(stop_event.wait())
+    wake_task = asyncio.ensure_future(battery_events.wait(timeout))
     try:
-        battery = psutil.sensors_battery()
-        if battery is None:
-            return None
-        return battery.power_plugged
-    except Exception as e:
-        print(f"Error checking power status: {e}")
-        return None
+        await asyncio.wait({stop_task, wake_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stop_task.cancel()
+        wake_task.cancel()
+    return stop_event.is_set()
 
 
 async def monitor_battery_loop(
     start_threshold: int = None,
     stop_threshold: int = None,
-    check_interval: int = None
+    check_interval: int = None,
+    controller: TapoP110Controller = None,
+    stop_event: Optional[asyncio.Event] = None
 ):
     """
     Main loop to monitor battery level and control charging
@@ -63,96 +201,154 @@ async def monitor_battery_loop(
         start_threshold: Battery percentage to start charging (default: from env or 40)
         stop_threshold: Battery percentage to stop charging (default: from env or 80)
         check_interval: Time in seconds between battery checks (default: from env or 60)
+        controller: Existing controller to reuse (default: a new TapoP110Controller)
+        stop_event: Event that stops the loop when set (default: stop on Ctrl+C only)
     """
     # Get thresholds from environment variables with defaults
     if start_threshold is None:
-        start_threshold = int(os.getenv('BATTERY_START_THRESHOLD', '40'))
+        start_threshold = int(_START_THRESHOLD)
     if stop_threshold is None:
-        stop_threshold = int(os.getenv('BATTERY_STOP_THRESHOLD', '80'))
+        stop_threshold = int(_STOP_THRESHOLD)
     if check_interval is None:
-        check_interval = int(os.getenv('BATTERY_CHECK_INTERVAL', '60'))
-    print(f"Starting battery monitoring loop...")
-    print(f"  Start charging threshold: {start_threshold}%")
-    print(f"  Stop charging threshold: {stop_threshold}%")
-    print(f"  Check interval: {check_interval} seconds")
-    print(f"  Press Ctrl+C to stop\n")
+        check_interval = int(_CHECK_INTERVAL)
+    logger.info("Starting battery monitoring loop...")
+    logger.info("  Start charging threshold: %d%%", start_threshold)
+    logger.info("  Stop charging threshold: %d%%", stop_threshold)
+    logger.info("  Check interval: %d seconds", check_interval)
+    logger.info("  Press Ctrl+C to stop\n")
     
-    try:
-        controller = TapoP110Controller()
-        print("Successfully connected to Tapo P110 device\n")
-    except Exception as e:
-        print(f"Error initializing Tapo controller: {e}")
-        print("Please ensure your .env file is configured correctly")
-        return
+    if controller is None:
+        try:
+            controller = TapoP110Controller()
+            logger.info("Successfully connected to Tapo P110 device\n")
+        except Exception as e:
+            logger.error("Error initializing Tapo controller: %s", e)
+            logger.error("Please ensure your .env file is configured correctly")
+            return
     
-    last_action = None
+    if stop_event is None:
+        stop_event = asyncio.Event()
     
-    while True:
-        try:
-            battery_percent = get_battery_percent()
-            plugged_in = is_plugged_in()
-            
-            if battery_percent is None:
-                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Unable to get battery information")
-                await asyncio.sleep(check_interval)
-                continue
-            
-            # Get current device status
-            device_status = await controller.get_device_status()
-            is_charger_on = (device_status == "ON")
-            
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            power_status = "Plugged in" if plugged_in else "On battery"
-            
-            print(f"[{timestamp}] Battery: {battery_percent:.1f}% | {power_status} | Charger: {'ON' if is_charger_on else 'OFF'}")
-            
-            # Decision logic for charging control
-            if battery_percent <= start_threshold:
-                if not is_charger_on:
-                    print(f"  → Battery at {battery_percent:.1f}% (≤ {start_threshold}%), turning charger ON")
-                    result = await controller.turn_on()
-                    if result:
-                        last_action = "turned_on"
-                        print(f"  ✓ Charger turned ON successfully")
-                    else:
-                        print(f"  ✗ Failed to turn charger ON")
+    # (zone, charger is on) as of the last reported check
+    last_reported = None
+    prev_percent = None
+    prev_time = None
+    
+    # Wake early when the OS reports a battery change, instead of only on timeouts
+    battery_events = BatteryEventWatcher()
+    if await battery_events.start():
+        logger.debug("Listening for OS battery change notifications")
+    
+    try:
+        while not stop_event.is_set():
+            try:
+                timestamp = datetime.now().isoformat(sep=' ', timespec='seconds')
+                in_range = last_reported is not None and last_reported[0] == Zone.MID
+                if in_range:
+                    # The device may not need querying this time, so read the battery first
+                    battery_percent, plugged_in = await get_battery_snapshot_async()
+                    device_status = None
+                    status_fetched = False
                 else:
-                    if last_action != "already_on":
-                        print(f"  → Battery at {battery_percent:.1f}% (≤ {start_threshold}%), charger already ON")
-                        last_action = "already_on"
-            
-            elif battery_percent >= stop_threshold:
-                if is_charger_on:
-                    print(f"  → Battery at {battery_percent:.1f}% (≥ {stop_threshold}%), turning charger OFF")
-                    result = await controller.turn_off()
-                    if result:
-                        last_action = "turned_off"
-                        print(f"  ✓ Charger turned OFF successfully")
+                    # The device status is needed anyway, so fetch it alongside the battery
+                    snapshot, device_status = await asyncio.gather(
+                        get_battery_snapshot_async(),
+                        controller.get_device_status(),
+                        return_exceptions=True
+                    )
+                    if isinstance(snapshot, Exception):
+                        logger.error("Error reading battery information: %s", snapshot)
+                        snapshot = (None, None)
+                    if isinstance(device_status, Exception):
+                        logger.error("Error getting device status: %s", device_status)
+                        device_status = None
+                    battery_percent, plugged_in = snapshot
+                    status_fetched = True
+                
+                if battery_percent is None:
+                    logger.warning("[%s] Unable to get battery information", timestamp)
+                    await wait_for_next_check(battery_events, stop_event, check_interval)
+                    continue
+                
+                # Estimate charge/discharge rate from the previous reading
+                now = time.monotonic()
+                rate = 0.0
+                if prev_percent is not None and now > prev_time:
+                    rate = (battery_percent - prev_percent) / (now - prev_time)
+                prev_percent = battery_percent
+                prev_time = now
+                
+                power_status = "Plugged in" if plugged_in else "On battery"
+                zone = get_battery_zone(battery_percent, start_threshold, stop_threshold)
+                
+                if in_range and zone == Zone.MID:
+                    # Still between thresholds with the charger state already known,
+                    # so nothing can change: skip querying the device
+                    is_charger_on = last_reported[1]
+                    logger.debug("[%s] Battery: %.1f%% | %s | Charger: %s",
+                                 timestamp, battery_percent, power_status, "ON" if is_charger_on else "OFF")
+                    await wait_for_next_check(battery_events, stop_event, get_next_check_delay(
+                        battery_percent, rate, start_threshold, stop_threshold, check_interval
+                    ))
+                    continue
+                
+                # Get current device status
+                if not status_fetched:
+                    device_status = await controller.get_device_status()
+                is_charger_on = (device_status == "ON")
+                
+                logger.info("[%s] Battery: %.1f%% | %s | Charger: %s",
+                            timestamp, battery_percent, power_status, "ON" if is_charger_on else "OFF")
+                
+                # Decision logic for charging control
+                state = (zone, is_charger_on)
+                action = DECISIONS[state]
+                if action == Action.LOG_ONLY and state == last_reported:
+                    action = Action.NOOP
+                
+                if action == Action.TURN_ON:
+                    logger.info("  → Battery at %.1f%% (≤ %d%%), turning charger ON", battery_percent, start_threshold)
+                    if await controller.turn_on():
+                        last_reported = state
+                        # Charging direction changed, so the old rate no longer applies
+                        prev_percent = None
+                        logger.info("  ✓ Charger turned ON successfully")
                     else:
-                        print(f"  ✗ Failed to turn charger OFF")
-                else:
-                    if last_action != "already_off":
-                        print(f"  → Battery at {battery_percent:.1f}% (≥ {stop_threshold}%), charger already OFF")
-                        last_action = "already_off"
-            
-            else:
-                # Battery is between thresholds
-                if last_action not in ["in_range_on", "in_range_off"]:
-                    status_msg = "ON" if is_charger_on else "OFF"
-                    print(f"  → Battery at {battery_percent:.1f}% (between {start_threshold}% and {stop_threshold}%), charger remains {status_msg}")
-                    last_action = "in_range_on" if is_charger_on else "in_range_off"
-            
-            print()  # Empty line for readability
-            
-            await asyncio.sleep(check_interval)
-            
-        except KeyboardInterrupt:
-            print("\n\nStopping battery monitoring loop...")
-            break
-        except Exception as e:
-            print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Error in monitoring loop: {e}")
-            import traceback
-            traceback.print_exc()
-            print(f"Retrying in {check_interval} seconds...\n")
-            await asyncio.sleep(check_interval)
-
+                        logger.warning("  ✗ Failed to turn charger ON")
+                
+                elif action == Action.TURN_OFF:
+                    logger.info("  → Battery at %.1f%% (≥ %d%%), turning charger OFF", battery_percent, stop_threshold)
+                    if await controller.turn_off():
+                        last_reported = state
+                        # Charging direction changed, so the old rate no longer applies
+                        prev_percent = None
+                        logger.info("  ✓ Charger turned OFF successfully")
+                    else:
+                        logger.warning("  ✗ Failed to turn charger OFF")
+                
+                elif action == Action.LOG_ONLY:
+                    if zone == Zone.LOW:
+                        logger.info("  → Battery at %.1f%% (≤ %d%%), charger already ON", battery_percent, start_threshold)
+                    elif zone == Zone.HIGH:
+                        logger.info("  → Battery at %.1f%% (≥ %d%%), charger already OFF", battery_percent, stop_threshold)
+                    else:
+                        logger.info("  → Battery at %.1f%% (between %d%% and %d%%), charger remains %s",
+                                    battery_percent, start_threshold, stop_threshold, "ON" if is_charger_on else "OFF")
+                    last_reported = state
+                
+                await wait_for_next_check(battery_events, stop_event, get_next_check_delay(
+                    battery_percent, rate, start_threshold, stop_threshold, check_interval
+                ))
+                
+            except KeyboardInterrupt:
+                logger.info("\n\nStopping battery monitoring loop...")
+                break
+            except Exception as e:
+                logger.exception("\n[%s] Error in monitoring loop: %s",
+                                 datetime.now().isoformat(sep=' ', timespec='seconds'), e)
+                logger.info("Retrying in %d seconds...\n", check_interval)
+                await wait_for_next_check(battery_events, stop_event, check_interval)
+        else:
+            logger.info("Stop requested, ending battery monitoring loop...")
+    finally:
+        battery_events.stop()
@@ -4,32 +4,55 @@ Unified interface for Tapo P110 device control and laptop battery monitoring
 """
 
 import asyncio
+import logging
+import os
+import signal
 import sys
+import threading
+import traceback
+from typing import Optional
 from dotenv import load_dotenv
 
 from tapo_control import TapoP110Controller
 from laptop_battery_loop import (
     get_battery_percent,
-    is_plugged_in,
+    get_battery_snapshot,
     monitor_battery_loop
 )
 
 # Load environment variables
 load_dotenv()
 
+# Controller shared by all actions so the device session is only set up once
+_controller: Optional[TapoP110Controller] = None
+
+
+async def _get_controller() -> TapoP110Controller:
+    """
+    Get the shared Tapo P110 controller, creating it on first use
+    
+    Returns:
+        The shared TapoP110Controller instance
+    """
+    global _controller
+    if _controller is None:
+        _controller = TapoP110Controller()
+    return _controller
+
 
 async def show_device_info():
     """
     Display Tapo P110 device information
     """
     try:
-        controller = TapoP110Controller()
-        await controller.get_device_info()
-        status = await controller.get_device_status()
-        print(f"\nCurrent device status: {status}")
+        controller = await _get_controller()
+        device_info = await controller.get_device_info()
+        if device_info is not None:
+            # Reuse the info we just fetched rather than querying the device again
+            status = "ON" if device_info.device_on else "OFF"
+            print(f"\nCurrent device status: {status}")
     except Exception as e:
         print(f"Error: {e}")
-        import traceback
         traceback.print_exc()
 
 
@@ -37,8 +60,7 @@ async def show_battery_status():
     """
     Display current laptop battery status
     """
-    battery_percent = get_battery_percent()
-    plugged_in = is_plugged_in()
+    battery_percent, plugged_in = get_battery_snapshot()
     
     if battery_percent is None:
         print("ERROR: Unable to access battery information.")
@@ -58,7 +80,7 @@ async def control_device(action: str):
         action: 'on' or 'off'
     """
     try:
-        controller = TapoP110Controller()
+        controller = await _get_controller()
         if action.lower() == 'on':
             await controller.turn_on()
         elif action.lower() == 'off':
@@ -67,7 +89,6 @@ async def control_device(action: str):
             print(f"Invalid action: {action}. Use 'on' or 'off'")
     except Exception as e:
         print(f"Error: {e}")
-        import traceback
         traceback.print_exc()
 
 
@@ -81,7 +102,60 @@ async def start_battery_monitoring():
         print("This script requires a laptop with battery monitoring capabilities.")
         return
     
-    await monitor_battery_loop()
+    try:
+        controller = await _get_controller()
+    except Exception as e:
+        print(f"Error initializing Tapo controller: {e}")
+        print("Please ensure your .env file is configured correctly")
+        return
+    
+    # Let SIGTERM (e.g. from a service manager) stop the loop cleanly
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stop_event.set)
+    except (NotImplementedError, AttributeError):
+        pass  # Signal handlers are not supported by the Windows event loop
+    
+    try:
+        await monitor_battery_loop(controller=controller, stop_event=stop_event)
+    finally:
+        try:
+            loop.remove_signal_handler(signal.SIGTERM)
+        except (NotImplementedError, AttributeError):
+            pass
+
+
+async def _async_input(prompt: str) -> str:
+    """
+    Read a line from stdin without blocking the event loop
+    
+    input() runs on a daemon thread so background tasks keep running while the
+    user is at the prompt, and a pending prompt never delays interpreter exit.
+    
+    Args:
+        prompt: Prompt text to display
+    
+    Returns:
+        The line entered by the user
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def resolve(setter, value):
+        if not future.done():
+            setter(value)
+    
+    def read_line():
+        try:
+            line = input(prompt)
+        except Exception as e:
+            loop.call_soon_threadsafe(resolve, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(resolve, future.set_result, line)
+    
+    threading.Thread(target=read_line, daemon=True).start()
+    return await future
 
 
 def print_menu():
@@ -105,10 +179,18 @@ async def interactive_menu():
     """
     Interactive menu for controlling Tapo device and battery monitoring
     """
+    # Log in while the menu waits for input, and keep the sessions warm
+    try:
+        controller = await _get_controller()
+        controller.start_connect()
+        controller.start_keepalive()
+    except Exception:
+        pass  # Configuration errors are reported when a device action is chosen
+    
     while True:
         print_menu()
         try:
-            choice = input("Enter your choice (1-6): ").strip()
+            choice = (await _async_input("Enter your choice (1-6): ")).strip()
             
             if choice == '1':
                 await show_device_info()
@@ -131,7 +213,6 @@ async def interactive_menu():
             break
         except Exception as e:
             print(f"\nError: {e}")
-            import traceback
             traceback.print_exc()
 
 
@@ -139,6 +220,9 @@ async def main():
     """
     Main entry point - supports command line arguments or interactive menu
     """
+    # Progress messages from the controller and monitoring loop go through logging
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(message)s')
+    
     # Check for command line arguments
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
@@ -179,6 +263,5 @@ if __name__ == "__main__":
         print("\n\nProgram interrupted by user")
     except Exception as e:
         print(f"\nFatal error: {e}")
-        import traceback
         traceback.print_exc()
 
@@ -28,8 +28,11 @@ setup(
     author="Your Name",
     author_email="your.email@example.com",
     url="https://github.com/yourusername/tapo-control",
-    py_modules=["tapo_control", "laptop_battery_loop", "main"],
+    py_modules=["tapo_control", "laptop_battery_loop", "battery_events", "main"],
     install_requires=requirements,
+    extras_require={
+        "events": ["dbus-next>=0.2.3; sys_platform == 'linux'"],
+    },
     python_requires=">=3.7",
     entry_points={
         "console_scripts": [
@@ -5,7 +5,13 @@ Controls Tapo P110 smart plugs via local network using Tapo API
 
 import os
 import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
 from dotenv import load_dotenv
 from tapo import ApiClient
 from tapo.requests import EnergyDataInterval, PowerDataInterval
@@ -13,6 +19,79 @@ from tapo.requests import EnergyDataInterval, PowerDataInterval
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Connection settings from the environment, read once at import
+_EMAIL = os.getenv('TP_LINK_EMAIL')
+_PASSWORD = os.getenv('TP_LINK_PASSWORD')
+_DEVICE_IP = os.getenv('TAPO_DEVICE_IP')
+
+# How long (seconds) a power state confirmed by turn_on/turn_off is trusted
+STATE_CACHE_TTL = 30.0
+
+# How long (seconds) a device info read is reused by read-only queries
+INFO_CACHE_TTL = 0.5
+
+# Maximum number of device sessions opened so overlapping queries can run in parallel
+DEVICE_POOL_SIZE = 3
+
+# Time (seconds) after which a device request is abandoned
+DEVICE_TIMEOUT = 5.0
+
+# Maximum number of plugs a TapoFleet talks to at once
+FLEET_CONCURRENCY = 8
+
+# Errors from invalid arguments or an unknown method, which say nothing about
+# the state of the session the call was made on
+_CALLER_ERRORS = (TypeError, ValueError, AttributeError)
+
+# Idle time (seconds) after which the device session is refreshed before use
+SESSION_IDLE_TIMEOUT = 300.0
+
+# Interval (seconds) between keepalive queries that keep the session warm
+KEEPALIVE_INTERVAL = 240.0
+
+# Cached tzinfo for default UTC timestamps
+_UTC = timezone.utc
+
+# First month of the quarter, indexed by month number (index 0 is unused)
+_QUARTER_START = (0, 1, 1, 1, 4, 4, 4, 7, 7, 7, 10, 10, 10)
+
+# Report logged by get_device_info as a single record
+_DEVICE_INFO_TEMPLATE = (
+    "\nDevice Information:\n"
+    "  IP Address: %s\n"
+    "  Device On: %s\n"
+    "  Device ID: %s\n"
+    "  Model: %s\n"
+    "  Hardware Version: %s\n"
+    "  Firmware Version: %s\n"
+    "  Type: %s%s"
+)
+
+
+def _build_interval_names(*interval_types) -> dict:
+    """
+    Map each energy/power data interval value to its member name
+    
+    The tapo interval types are native enums that are not iterable and have no
+    .name, so members are found by attribute when iteration is not supported.
+    """
+    names = {}
+    for interval_type in interval_types:
+        try:
+            names.update((member, member.name) for member in interval_type)
+        except TypeError:
+            for attr in dir(interval_type):
+                member = getattr(interval_type, attr)
+                if not attr.startswith('_') and isinstance(member, interval_type):
+                    names[member] = attr
+    return names
+
+
+# Display names for the energy and power data intervals
+_INTERVAL_NAMES = _build_interval_names(EnergyDataInterval, PowerDataInterval)
+
 
 def get_quarter_start_month(today: datetime) -> int:
     """
@@ -24,7 +103,23 @@ def get_quarter_start_month(today: datetime) -> int:
     Returns:
         The month number (1-12) representing the first month of the quarter
     """
-    return ((today.month - 1) // 3) * 3 + 1
+    return _QUARTER_START[today.month]
+
+
+def requires_device(method):
+    """
+    Decorator for controller methods that need an open device session
+    
+    Opens the session pool first if needed; if that fails the method is not
+    called and None is returned.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if not await self._ensure_device_connected():
+            logger.error("Device not found or could not connect")
+            return None
+        return await method(self, *args, **kwargs)
+    return wrapper
 
 
 class TapoP110Controller:
@@ -32,7 +127,8 @@ class TapoP110Controller:
     Controller class for Tapo P110 smart plug devices using local network API
     """
     
-    def __init__(self, email: str = None, password: str = None, device_ip: str = None):
+    def __init__(self, email: str = None, password: str = None, device_ip: str = None,
+                 pool_size: int = DEVICE_POOL_SIZE, timeout: float = DEVICE_TIMEOUT):
         """
         Initialize the Tapo P110 controller with credentials and device IP
         
@@ -40,10 +136,12 @@ class TapoP110Controller:
             email: Tapo account email (or from .env file)
             password: Tapo account password (or from .env file)
             device_ip: Device IP address (or from .env file)
+            pool_size: Maximum number of device sessions kept open for parallel queries
+            timeout: Time in seconds after which a device request is abandoned
         """
-        self.email = email or os.getenv('TP_LINK_EMAIL')
-        self.password = password or os.getenv('TP_LINK_PASSWORD')
-        self.device_ip = device_ip or os.getenv('TAPO_DEVICE_IP')
+        self.email = email or _EMAIL
+        self.password = password or _PASSWORD
+        self.device_ip = device_ip or _DEVICE_IP
         
         if not self.email or not self.password:
             raise ValueError("Email and password must be provided either as arguments or in .env file")
@@ -51,144 +149,447 @@ class TapoP110Controller:
         if not self.device_ip:
             raise ValueError("Device IP address must be provided either as argument or in .env file as TAPO_DEVICE_IP")
         
-        self.client = ApiClient(self.email, self.password)
-        self.device = None
+        self._client = None
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self._pool = deque()  # idle (device, last used) pairs, least recently used first
+        self._pool_sem = None
+        self._pool_lock = None
+        self._in_use = 0
+        self._keepalive_task = None
+        self._connect_task = None
+        self._power_queue = None
+        self._power_worker = None
+        self._last_state = None
+        self._last_state_ts = 0.0
+        self._info_cache = None  # (monotonic timestamp, device info) of the last read
+    
+    @property
+    def client(self):
+        """
+        Tapo API client, created on first use
+        """
+        if self._client is None:
+            self._client = ApiClient(self.email, self.password)
+        return self._client
     
-    async def _ensure_device_connected(self):
+    async def _ensure_device_connected(self, quiet: bool = False):
         """
-        Ensure device is connected. Connect if not already connected.
+        Ensure a device session is open. Connect if not already connected.
+        
+        Connecting performs the Tapo login, so only one session is opened on
+        first use, or again after failed calls have dropped every session.
+        Further sessions are opened by _take_device when calls overlap.
+        
+        Args:
+            quiet: Log a connection failure at debug level instead of as an error
         
         Returns:
-            Device object if successful, None otherwise
+            True if at least one session is available, False otherwise
         """
-        if self.device is None:
+        if self._pool or self._in_use:
+            return True
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool or self._in_use:
+                return True
             try:
-                self.device = await self.client.p110(self.device_ip)
+                device = await self._with_timeout(self.client.p110(self.device_ip))
             except Exception as e:
-                print(f"Error connecting to device at {self.device_ip}: {e}")
-                import traceback
-                traceback.print_exc()
-                return None
-        return self.device
+                if quiet:
+                    logger.debug("Could not connect to device at %s: %s", self.device_ip, e)
+                else:
+                    logger.exception("Error connecting to device at %s: %s", self.device_ip, e)
+                return False
+            self._pool.append((device, time.monotonic()))
+        return True
     
-    async def turn_on(self):
+    async def _with_timeout(self, coro, timeout: float = None):
         """
-        Turn on the P110 device
+        Await a device request, giving up after the controller timeout
+        
+        Args:
+            coro: Device request coroutine to await
+            timeout: Time in seconds to wait (default: self.timeout)
         
         Returns:
-            True if successful, False otherwise
+            The result of the request
+        
+        Raises:
+            asyncio.TimeoutError: If the request did not finish in time
+        """
+        return await asyncio.wait_for(coro, timeout=self.timeout if timeout is None else timeout)
+    
+    async def connect(self):
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            print("Device not found or could not connect")
-            return False
+        Open the device sessions ahead of the first command
         
-        try:
-            # Get current status before turning on
+        Optional: every device method connects on demand, but awaiting this at
+        startup moves the login cost out of the first user action.
+        
+        Returns:
+            True if connected, False otherwise
+        """
+        return await self._ensure_device_connected()
+    
+    def start_connect(self):
+        """
+        Start connecting in the background without waiting for it
+        
+        A failure is only logged at debug level; it is reported by the first
+        device method that needs the connection.
+        """
+        if self._connect_task is None or self._connect_task.done():
+            self._connect_task = asyncio.ensure_future(self._ensure_device_connected(quiet=True))
+    
+    async def _take_device(self, fresh: bool = False):
+        """
+        Take a session out of the pool, connecting a new one if none is idle
+        
+        A session left idle for longer than SESSION_IDLE_TIMEOUT is refreshed
+        before it is handed out.
+        
+        Args:
+            fresh: Always connect a new session instead of reusing an idle one
+        
+        Returns:
+            Device object
+        """
+        if self._pool and not fresh:
+            device, last_used = self._pool.popleft()
+            if time.monotonic() - last_used <= SESSION_IDLE_TIMEOUT:
+                return device
             try:
-                device_info = await device.get_device_info()
-                is_currently_on = device_info.device_on
-                status_str = "ON" if is_currently_on else "OFF"
-                print(f"Device current status: {status_str}")
+                await self._with_timeout(device.refresh_session())
+                return device
             except Exception as e:
-                print(f"Warning: Could not determine current status: {e}")
-                print("  Proceeding with turn on command anyway...")
-            
-            # Turn on the device
-            print(f"Executing turn on command...")
-            try:
-                await device.on()
-                print(f"[OK] Command executed successfully")
-            except Exception as cmd_error:
-                print(f"[ERROR] Error executing turn on command: {cmd_error}")
-                import traceback
-                traceback.print_exc()
-                return False
-            
-            # Wait a moment for the command to process
-            await asyncio.sleep(1)
-            
-            # Verify the device is actually on
+                logger.debug("Could not refresh idle session, reconnecting: %s", e)
+        return await self._with_timeout(self.client.p110(self.device_ip))
+    
+    @asynccontextmanager
+    async def _acquire_device(self, fresh: bool = False):
+        """
+        Borrow a device session for the duration of an async with block
+        
+        At most pool_size sessions are in use at once. The session goes back to
+        the pool when the block exits normally or raises one of _CALLER_ERRORS;
+        if the block raises anything else (a transport error or timeout), the
+        session is assumed to be stale and is dropped.
+        
+        Args:
+            fresh: Always connect a new session instead of reusing an idle one
+        """
+        if self._pool_sem is None:
+            self._pool_sem = asyncio.Semaphore(self.pool_size)
+        async with self._pool_sem:
+            device = await self._take_device(fresh)
+            self._in_use += 1
             try:
-                device_info = await device.get_device_info()
-                is_now_on = device_info.device_on
-                
-                if is_now_on:
-                    print(f"[SUCCESS] Successfully turned ON device")
-                    return True
-                else:
-                    print(f"[WARNING] Device status is still OFF")
-                    print(f"  The turn on command may not have worked. Please check the device manually.")
-                    return False
-            except Exception as e:
-                print(f"[INFO] Command executed, but could not verify device status: {e}")
-                print(f"  Please check the physical device to confirm it turned on")
-                return True  # Assume success if command executed without error
+                yield device
+            except _CALLER_ERRORS:
+                self._release_device(device)
+                raise
+            finally:
+                self._in_use -= 1
+            self._release_device(device)
+    
+    def _release_device(self, device):
+        """
+        Return a healthy session to the pool, unless the pool is already full
+        
+        Args:
+            device: Device session to return
+        """
+        if len(self._pool) < self.pool_size:
+            self._pool.append((device, time.monotonic()))
+    
+    async def _call_device(self, method: str, *args):
+        """
+        Call a device method on a pooled session, retrying once on a new session if it fails
+        
+        A failed call usually means the session went stale (e.g. the device
+        rebooted or dropped the connection), so the session is discarded and
+        the call is repeated on a fresh connection. Errors raised for invalid
+        arguments or an unknown method are not retried, and neither are
+        timeouts, so an unresponsive device fails after a single timeout.
+        
+        Args:
+            method: Name of the device method to call
+            *args: Arguments for the device method
+        
+        Returns:
+            The result of the device method
+        """
+        try:
+            async with self._acquire_device() as device:
+                return await self._with_timeout(getattr(device, method)(*args))
+        except _CALLER_ERRORS:
+            raise
+        except asyncio.TimeoutError:
+            # The session has been dropped, so the next call reconnects
+            logger.debug("Device call %s timed out after %.1fs", method, self.timeout)
+            raise
         except Exception as e:
-            print(f"[ERROR] Error turning device on: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+            logger.debug("Device call %s failed, reconnecting and retrying: %s", method, e)
+        async with self._acquire_device(fresh=True) as device:
+            return await self._with_timeout(getattr(device, method)(*args))
     
-    async def turn_off(self):
+    async def _keepalive_loop(self, interval: float):
         """
-        Turn off the P110 device
+        Periodically query the device so idle sessions do not expire
+        
+        Args:
+            interval: Time in seconds between keepalive queries
+        """
+        while True:
+            await asyncio.sleep(interval)
+            # Each call takes the least recently used session and returns it to
+            # the back of the pool, so this touches every session idle too long
+            for _ in range(len(self._pool)):
+                if not self._pool or time.monotonic() - self._pool[0][1] < interval:
+                    break
+                try:
+                    await self._call_device('get_device_info')
+                except Exception as e:
+                    logger.debug("Keepalive query failed: %s", e)
+                    break
+    
+    def start_keepalive(self, interval: float = KEEPALIVE_INTERVAL):
+        """
+        Start a background task that keeps the device session warm
+        
+        Useful for long-lived interactive sessions, where the first command after
+        an idle period would otherwise pay for a new handshake.
+        
+        Args:
+            interval: Time in seconds between keepalive queries
+        """
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = asyncio.ensure_future(self._keepalive_loop(interval))
+    
+    def stop_keepalive(self):
+        """
+        Stop the background keepalive task, if running
+        """
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+    
+    def _remember_state(self, is_on):
+        """
+        Record a confirmed power state so get_device_status can skip a query
+        
+        Args:
+            is_on: True/False for a confirmed state, None to forget the cached state
+        """
+        self._last_state = is_on
+        self._last_state_ts = time.monotonic()
+    
+    async def _cached_device_info(self, ttl: float = INFO_CACHE_TTL):
+        """
+        Get device info, reusing a read made within the last ttl seconds
+        
+        Args:
+            ttl: Maximum age in seconds of a cached read to reuse
         
         Returns:
-            True if successful, False otherwise
+            Device info object
+        """
+        if self._info_cache is not None:
+            read_at, device_info = self._info_cache
+            if time.monotonic() - read_at < ttl:
+                return device_info
+        device_info = await self._call_device('get_device_info')
+        self._info_cache = (time.monotonic(), device_info)
+        return device_info
+    
+    async def _read_device_on(self, timeout: float = None):
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            print("Device not found or could not connect")
-            return False
+        Read the device power state with a single device info query
         
+        Args:
+            timeout: Time in seconds to wait for the read, including any retry
+                     (default: only the per-request timeout applies)
+        
+        Returns:
+            True if the device is on, False if off, None if the state could not be read
+        """
         try:
-            # Get current status before turning off
-            try:
-                device_info = await device.get_device_info()
-                is_currently_on = device_info.device_on
-                status_str = "ON" if is_currently_on else "OFF"
-                print(f"Device current status: {status_str}")
-            except Exception as e:
-                print(f"Warning: Could not determine current status: {e}")
-                print("  Proceeding with turn off command anyway...")
-            
-            # Turn off the device
-            print(f"Executing turn off command...")
+            read = self._call_device('get_device_info')
+            if timeout is None:
+                device_info = await read
+            else:
+                device_info = await self._with_timeout(read, timeout)
+        except Exception as e:
+            logger.debug("Could not read device power state: %s", e)
+            return None
+        return getattr(device_info, 'device_on', None)
+    
+    async def _wait_for_state(self, expected_on: bool, timeout: float = 2.0, interval: float = 0.1):
+        """
+        Poll the device until its power state matches the expected state
+        
+        Failed reads are retried like mismatches until the timeout. Each read
+        is cut off at the time remaining, so an unresponsive device cannot hold
+        this up for longer than the timeout.
+        
+        Args:
+            expected_on: True to wait for ON, False to wait for OFF
+            timeout: Maximum time in seconds to keep polling
+            interval: Time in seconds between reads
+        
+        Returns:
+            True if the device reached the expected state, False if it did not,
+            None if the state could not be read at all
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        result = None
+        while True:
+            is_on = await self._read_device_on(timeout=max(0.0, deadline - loop.time()))
+            if is_on is not None:
+                if is_on == expected_on:
+                    return True
+                result = False
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return result
+            await asyncio.sleep(min(interval, remaining))
+    
+    async def _set_power(self, turn_on: bool, return_prev_state: bool = False):
+        """
+        Switch the device on or off and verify the new state
+        
+        Args:
+            turn_on: True to turn the device on, False to turn it off
+            return_prev_state: Read the power state concurrently with the command
+        
+        Returns:
+            Tuple of (success, previous state). The previous state is True/False,
+            or None if it was not requested or could not be read.
+        """
+        word = "on" if turn_on else "off"
+        target, other = ("ON", "OFF") if turn_on else ("OFF", "ON")
+        
+        if not await self._ensure_device_connected():
+            logger.error("Device not found or could not connect")
+            return False, None
+        
+        prev_state = None
+        try:
+            # Turn the device on/off
+            logger.debug("Executing turn %s command...", word)
+            self._remember_state(None)
+            self._info_cache = None
+            command = self._call_device('on' if turn_on else 'off')
             try:
-                await device.off()
-                print(f"[OK] Command executed successfully")
+                if return_prev_state:
+                    prev_state, result = await asyncio.gather(self._read_device_on(), command)
+                else:
+                    result = await command
+                logger.debug("[OK] Command executed successfully")
             except Exception as cmd_error:
-                print(f"[ERROR] Error executing turn off command: {cmd_error}")
-                import traceback
-                traceback.print_exc()
-                return False
+                logger.exception("[ERROR] Error executing turn %s command: %s", word, cmd_error)
+                return False, prev_state
             
-            # Wait a moment for the command to process
-            await asyncio.sleep(1)
+            # Verify the device actually switched. The current tapo binding returns
+            # None from on()/off(); a response that reports the state saves the poll.
+            if getattr(result, 'device_on', None) == turn_on:
+                confirmed = True
+            else:
+                confirmed = await self._wait_for_state(expected_on=turn_on)
+            if confirmed:
+                self._remember_state(turn_on)
+                logger.info("[SUCCESS] Successfully turned %s device", target)
+                return True, prev_state
+            elif confirmed is None:
+                logger.info("[INFO] Command executed, but could not verify device status")
+                logger.info("  Please check the physical device to confirm it turned %s", word)
+                return True, prev_state  # Assume success if command executed without error
+            else:
+                logger.warning("[WARNING] Device status is still %s", other)
+                logger.warning("  The turn %s command may not have worked. Please check the device manually.", word)
+                return False, prev_state
+        except Exception as e:
+            logger.exception("[ERROR] Error turning device %s: %s", word, e)
+            return False, prev_state
+    
+    async def _submit_power(self, turn_on: bool, return_prev_state: bool = False):
+        """
+        Queue an on/off command for the power worker and wait for its outcome
+        
+        Args:
+            turn_on: True to turn the device on, False to turn it off
+            return_prev_state: Read the power state concurrently with the command
+        
+        Returns:
+            Tuple of (success, previous state), as returned by _set_power
+        """
+        if self._power_queue is None:
+            self._power_queue = asyncio.Queue()
+        future = asyncio.get_running_loop().create_future()
+        self._power_queue.put_nowait((turn_on, return_prev_state, future))
+        if self._power_worker is None or self._power_worker.done():
+            self._power_worker = asyncio.ensure_future(self._run_power_worker())
+        return await future
+    
+    async def _run_power_worker(self):
+        """
+        Apply queued on/off commands one batch at a time
+        
+        Commands queued while the previous one was running are coalesced: only
+        the last requested state is sent to the device. Each caller is told
+        whether the device ended up in the state it asked for.
+        """
+        while not self._power_queue.empty():
+            batch = []
+            while not self._power_queue.empty():
+                batch.append(self._power_queue.get_nowait())
             
-            # Verify the device is actually off
+            final_state = batch[-1][0]
+            want_prev_state = any(return_prev_state for _, return_prev_state, _ in batch)
             try:
-                device_info = await device.get_device_info()
-                is_now_on = device_info.device_on
-                
-                if not is_now_on:
-                    print(f"[SUCCESS] Successfully turned OFF device")
-                    return True
-                else:
-                    print(f"[WARNING] Device status is still ON")
-                    print(f"  The turn off command may not have worked. Please check the device manually.")
-                    return False
+                success, prev_state = await self._set_power(final_state, want_prev_state)
             except Exception as e:
-                print(f"[INFO] Command executed, but could not verify device status: {e}")
-                print(f"  Please check the physical device to confirm it turned off")
-                return True  # Assume success if command executed without error
-        except Exception as e:
-            print(f"[ERROR] Error turning device off: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for turn_on, _, future in batch:
+                if not future.done():
+                    future.set_result((success and turn_on == final_state, prev_state))
     
+    async def turn_on(self, return_prev_state: bool = False):
+        """
+        Turn on the P110 device
+        
+        Args:
+            return_prev_state: Also return the power state read concurrently with the command
+        
+        Returns:
+            True if successful, False otherwise. With return_prev_state, a tuple of
+            (success, previous state) where the previous state is True/False/None.
+        """
+        success, prev_state = await self._submit_power(True, return_prev_state)
+        return (success, prev_state) if return_prev_state else success
+    
+    async def turn_off(self, return_prev_state: bool = False):
+        """
+        Turn off the P110 device
+        
+        Args:
+            return_prev_state: Also return the power state read concurrently with the command
+        
+        Returns:
+            True if successful, False otherwise. With return_prev_state, a tuple of
+            (success, previous state) where the previous state is True/False/None.
+        """
+        success, prev_state = await self._submit_power(False, return_prev_state)
+        return (success, prev_state) if return_prev_state else success
+    
+    @requires_device
     async def get_device_info(self):
         """
         Get information about the P110 device
@@ -196,48 +597,63 @@ class TapoP110Controller:
         Returns:
             Device info object if successful, None otherwise
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            print("Device not found or could not connect")
-            return None
-        
         try:
-            device_info = await device.get_device_info()
-            print(f"\nDevice Information:")
-            print(f"  IP Address: {self.device_ip}")
-            print(f"  Device On: {device_info.device_on}")
-            print(f"  Device ID: {device_info.device_id}")
-            print(f"  Model: {device_info.model}")
-            print(f"  Hardware Version: {device_info.hw_ver}")
-            print(f"  Firmware Version: {device_info.fw_ver}")
-            print(f"  Type: {device_info.type}")
-            if hasattr(device_info, 'nickname'):
-                print(f"  Nickname: {device_info.nickname}")
+            device_info = await self._cached_device_info()
+            if logger.isEnabledFor(logging.INFO):
+                nickname = ("\n  Nickname: %s" % device_info.nickname
+                            if hasattr(device_info, 'nickname') else "")
+                logger.info(_DEVICE_INFO_TEMPLATE, self.device_ip, device_info.device_on,
+                            device_info.device_id, device_info.model, device_info.hw_ver,
+                            device_info.fw_ver, device_info.type, nickname)
             return device_info
         except Exception as e:
-            print(f"Error retrieving device info: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error retrieving device info: %s", e)
             return None
     
-    async def get_device_status(self):
+    @requires_device
+    async def get_device_status(self, force: bool = False):
         """
         Get the current power status of the device
         
+        A state confirmed by turn_on/turn_off within the last STATE_CACHE_TTL
+        seconds is returned without querying the device.
+        
+        Args:
+            force: Always query the device, ignoring any cached state
+        
         Returns:
             String status: "ON" or "OFF"
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            return None
+        if (not force and self._last_state is not None
+                and time.monotonic() - self._last_state_ts < STATE_CACHE_TTL):
+            return "ON" if self._last_state else "OFF"
         
         try:
-            device_info = await device.get_device_info()
+            device_info = await self._cached_device_info()
             return "ON" if device_info.device_on else "OFF"
         except Exception as e:
-            print(f"Error getting device status: {e}")
+            logger.error("Error getting device status: %s", e)
             return None
     
+    @requires_device
+    async def snapshot(self):
+        """
+        Fetch device info, current power, device usage and energy usage concurrently
+        
+        Returns:
+            Dict keyed by 'device_info', 'current_power', 'device_usage' and
+            'energy_usage'. Each value is the query result, or the exception it
+            raised so that one failure does not hide the others.
+            None if the device could not be connected.
+        """
+        methods = ('get_device_info', 'get_current_power', 'get_device_usage', 'get_energy_usage')
+        results = await asyncio.gather(
+            *(self._call_device(method) for method in methods),
+            return_exceptions=True
+        )
+        return {method[len('get_'):]: result for method, result in zip(methods, results)}
+    
+    @requires_device
     async def get_current_power(self):
         """
         Get current power consumption data from the P110 device
@@ -245,22 +661,17 @@ class TapoP110Controller:
         Returns:
             Current power object if successful, None otherwise
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            print("Device not found or could not connect")
-            return None
-        
         try:
-            current_power = await device.get_current_power()
-            print(f"\nCurrent Power:")
-            print(f"  {current_power.to_dict()}")
+            current_power = await self._call_device('get_current_power')
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("\nCurrent Power:")
+                logger.info("  %s", current_power.to_dict())
             return current_power
         except Exception as e:
-            print(f"Error retrieving current power: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error retrieving current power: %s", e)
             return None
     
+    @requires_device
     async def get_device_usage(self):
         """
         Get device usage statistics from the P110 device
@@ -268,22 +679,17 @@ class TapoP110Controller:
         Returns:
             Device usage object if successful, None otherwise
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            print("Device not found or could not connect")
-            return None
-        
         try:
-            device_usage = await device.get_device_usage()
-            print(f"\nDevice Usage:")
-            print(f"  {device_usage.to_dict()}")
+            device_usage = await self._call_device('get_device_usage')
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("\nDevice Usage:")
+                logger.info("  %s", device_usage.to_dict())
             return device_usage
         except Exception as e:
-            print(f"Error retrieving device usage: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error retrieving device usage: %s", e)
             return None
     
+    @requires_device
     async def get_energy_usage(self):
         """
         Get energy usage statistics from the P110 device
@@ -291,22 +697,17 @@ class TapoP110Controller:
         Returns:
             Energy usage object if successful, None otherwise
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            print("Device not found or could not connect")
-            return None
-        
         try:
-            energy_usage = await device.get_energy_usage()
-            print(f"\nEnergy Usage:")
-            print(f"  {energy_usage.to_dict()}")
+            energy_usage = await self._call_device('get_energy_usage')
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("\nEnergy Usage:")
+                logger.info("  %s", energy_usage.to_dict())
             return energy_usage
         except Exception as e:
-            print(f"Error retrieving energy usage: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error retrieving energy usage: %s", e)
             return None
     
+    @requires_device
     async def get_energy_data(self, interval: EnergyDataInterval, start_date: datetime = None):
         """
         Get energy data from the P110 device with specified interval
@@ -321,31 +722,26 @@ class TapoP110Controller:
         Returns:
             Energy data object if successful, None otherwise
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            print("Device not found or could not connect")
-            return None
-        
         if start_date is None:
-            start_date = datetime.now(timezone.utc)
+            start_date = datetime.now(_UTC)
         
         try:
-            energy_data = await device.get_energy_data(interval, start_date)
-            interval_name = interval.name if hasattr(interval, 'name') else str(interval)
-            print(f"\nEnergy data ({interval_name.lower()}):")
-            print(f"  Start date time: '{energy_data.start_date_time}'")
-            print(f"  Entries: {len(energy_data.entries)}")
-            if energy_data.entries:
-                print(f"  First entry: {energy_data.entries[0].to_dict()}")
-            else:
-                print(f"  No entries available")
+            energy_data = await self._call_device('get_energy_data', interval, start_date)
+            if logger.isEnabledFor(logging.INFO):
+                interval_name = _INTERVAL_NAMES.get(interval, str(interval)).lower()
+                logger.info("\nEnergy data (%s):", interval_name)
+                logger.info("  Start date time: '%s'", energy_data.start_date_time)
+                logger.info("  Entries: %d", len(energy_data.entries))
+                if energy_data.entries:
+                    logger.info("  First entry: %s", energy_data.entries[0].to_dict())
+                else:
+                    logger.info("  No entries available")
             return energy_data
         except Exception as e:
-            print(f"Error retrieving energy data: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error retrieving energy data: %s", e)
             return None
     
+    @requires_device
     async def get_power_data(self, interval: PowerDataInterval, start_date_time: datetime, end_date_time: datetime):
         """
         Get power data from the P110 device with specified interval
@@ -360,27 +756,99 @@ class TapoP110Controller:
         Returns:
             Power data object if successful, None otherwise
         """
-        device = await self._ensure_device_connected()
-        if not device:
-            print("Device not found or could not connect")
-            return None
-        
         try:
-            power_data = await device.get_power_data(interval, start_date_time, end_date_time)
-            interval_name = interval.name if hasattr(interval, 'name') else str(interval)
-            print(f"\nPower data ({interval_name.lower()}):")
-            print(f"  Start date time: '{power_data.start_date_time}'")
-            print(f"  End date time: '{power_data.end_date_time}'")
-            print(f"  Entries: {len(power_data.entries)}")
-            if power_data.entries:
-                print(f"  First entry: {power_data.entries[0].to_dict()}")
-            else:
-                print(f"  No entries available")
+            power_data = await self._call_device('get_power_data', interval, start_date_time, end_date_time)
+            if logger.isEnabledFor(logging.INFO):
+                interval_name = _INTERVAL_NAMES.get(interval, str(interval)).lower()
+                logger.info("\nPower data (%s):", interval_name)
+                logger.info("  Start date time: '%s'", power_data.start_date_time)
+                logger.info("  End date time: '%s'", power_data.end_date_time)
+                logger.info("  Entries: %d", len(power_data.entries))
+                if power_data.entries:
+                    logger.info("  First entry: %s", power_data.entries[0].to_dict())
+                else:
+                    logger.info("  No entries available")
             return power_data
         except Exception as e:
-            print(f"Error retrieving power data: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error retrieving power data: %s", e)
             return None
 
 
+class TapoFleet:
+    """
+    Controls several Tapo P110 plugs at once, one TapoP110Controller per IP
+    """
+    
+    def __init__(self, device_ips: List[str], email: str = None, password: str = None,
+                 max_concurrency: int = FLEET_CONCURRENCY):
+        """
+        Initialize a controller for each device IP
+        
+        Args:
+            device_ips: IP addresses of the plugs to control
+            email: Tapo account email (or from .env file)
+            password: Tapo account password (or from .env file)
+            max_concurrency: Maximum number of plugs queried at the same time
+        """
+        if not device_ips:
+            raise ValueError("At least one device IP address must be provided")
+        
+        self.controllers = {
+            ip: TapoP110Controller(email=email, password=password, device_ip=ip)
+            for ip in device_ips
+        }
+        self.max_concurrency = max(1, max_concurrency)
+        self._sem = None
+    
+    async def _run_all(self, method: str, *args) -> Dict[str, Any]:
+        """
+        Call a controller method on every plug, max_concurrency plugs at a time
+        
+        Args:
+            method: Name of the TapoP110Controller method to call
+            *args: Arguments for the method
+        
+        Returns:
+            Dict mapping each device IP to the method's result, or the exception
+            it raised so that one failing plug does not hide the others
+        """
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(controller):
+            async with self._sem:
+                return await getattr(controller, method)(*args)
+        
+        results = await asyncio.gather(
+            *(run(controller) for controller in self.controllers.values()),
+            return_exceptions=True
+        )
+        return dict(zip(self.controllers, results))
+    
+    async def snapshot_all(self) -> Dict[str, Any]:
+        """
+        Fetch a snapshot() from every plug concurrently
+        
+        Returns:
+            Dict mapping each device IP to its snapshot dict (None if it could
+            not be connected) or the exception raised
+        """
+        return await self._run_all('snapshot')
+    
+    async def turn_all_on(self) -> Dict[str, Any]:
+        """
+        Turn every plug on concurrently
+        
+        Returns:
+            Dict mapping each device IP to True/False, or the exception raised
+        """
+        return await self._run_all('turn_on')
+    
+    async def turn_all_off(self) -> Dict[str, Any]:
+        """
+        Turn every plug off concurrently
+        
+        Returns:
+            Dict mapping each device IP to True/False, or the exception raised
+        """
+        return await self._run_all('turn_off')